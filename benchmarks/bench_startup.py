@@ -0,0 +1,66 @@
+"""Startup budget for hetzner_ddns.py.
+
+Measures how long ``hetzner_ddns.py --check-config`` takes on top of a bare
+interpreter start and fails if it exceeds the budget. One-shot runs
+(cron/systemd timers) pay this cost on every invocation.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget-ms MS]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must not be imported just to validate the configuration
+HEAVY_MODULES = ("requests", "table_server", "hetzner_api", "coordination", "dyndns", "reverse_index")
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("ZONE_NAME", "example.com")
+    env.setdefault("API_TOKEN", "bench")
+    return env
+
+
+def _median_ms(cmd, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=_env(), check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "50")))
+    args = parser.parse_args()
+
+    base = _median_ms([sys.executable, "-c", "pass"], args.runs)
+    check = _median_ms([sys.executable, "hetzner_ddns.py", "--check-config"], args.runs)
+    overhead = check - base
+
+    probe = (
+        "import sys, hetzner_ddns; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, env=_env(), check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    print(f"interpreter start : {base:7.1f} ms")
+    print(f"--check-config    : {check:7.1f} ms")
+    print(f"updater overhead  : {overhead:7.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"eager heavy imports: {loaded or 'none'}")
+
+    ok = overhead <= args.budget_ms and not loaded
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import bisect
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+
+DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+
+MODES = ("off", "leader", "shard")
+# Virtual nodes per replica on the hash ring; smooths the zone distribution
+RING_REPLICAS = 64
+
+
+class FileStore:
+    """Tiny key-value store on a (shared) directory.
+
+    Stand-in for etcd/Consul: every key is a JSON file, writes are atomic
+    (write + rename) and read-modify-write sequences are serialized with an
+    flock on ``.lock``. The directory may live on NFS or a shared volume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        import fcntl
+        with open(os.path.join(self.path, ".lock"), "a+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        tmp = self._file(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, self._file(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def items(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for fn in os.listdir(self.path):
+            if fn.endswith(".json") and fn.startswith(prefix):
+                key = fn[:-len(".json")]
+                val = self.get(key)
+                if val is not None:
+                    out[key] = val
+        return out
+
+
+def _hash(key: str) -> int:
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def build_ring(members: List[str]) -> List[tuple]:
+    ring = []
+    for m in members:
+        for i in range(RING_REPLICAS):
+            ring.append((_hash(f"{m}#{i}"), m))
+    ring.sort()
+    return ring
+
+
+def ring_owner(ring: List[tuple], key: str) -> Optional[str]:
+    """Replica owning ``key``: first ring point clockwise from its hash."""
+    if not ring:
+        return None
+    idx = bisect.bisect(ring, (_hash(key), ""))
+    return ring[idx % len(ring)][1]
+
+
+class Coordinator:
+    """Decides which configured zones this replica is responsible for.
+
+    Modes:
+      - ``off``: handle everything (single instance, default)
+      - ``leader``: one replica holds a lease and handles all zones
+      - ``shard``: live replicas split the zones by consistent hashing
+
+    A background thread renews the lease/heartbeat every ``lease_ttl / 3``
+    seconds. A replica that stops renewing drops out after ``lease_ttl`` and
+    the others take over its work on their next tick.
+    """
+
+    def __init__(self, mode: str, store: Optional[FileStore], replica_id: str, lease_ttl: float = 30):
+        self.mode = mode
+        self.store = store
+        self.replica_id = replica_id
+        self.lease_ttl = lease_ttl
+        self._lock = threading.Lock()
+        self._leader = False
+        self._ring: List[tuple] = []
+        # Our view is only trusted until our own lease/heartbeat would expire
+        self._valid_until = 0.0
+
+    def heartbeat(self) -> None:
+        if self.mode == "off" or self.store is None:
+            return
+        now = time.time()
+        expires = now + self.lease_ttl
+        with self.store.locked():
+            if self.mode == "leader":
+                lease = self.store.get("leader")
+                if not lease or lease.get("owner") == self.replica_id or lease.get("expires", 0) < now:
+                    if DEBUG and (not lease or lease.get("owner") != self.replica_id):
+                        print(f"[DEBUG] coordination: {self.replica_id} acquired leader lease")
+                    self.store.put("leader", {"owner": self.replica_id, "expires": expires})
+                    leader = True
+                else:
+                    leader = False
+                with self._lock:
+                    self._leader = leader
+                    self._valid_until = expires
+            else:
+                self.store.put(f"member-{self.replica_id}", {"owner": self.replica_id, "expires": expires})
+                members = sorted(
+                    v.get("owner", k[len("member-"):])
+                    for k, v in self.store.items("member-").items()
+                    if v.get("expires", 0) >= now
+                )
+                with self._lock:
+                    self._ring = build_ring(members)
+                    self._valid_until = expires
+
+    def release(self) -> None:
+        """Give up lease/membership so other replicas take over immediately."""
+        if self.mode == "off" or self.store is None:
+            return
+        try:
+            with self.store.locked():
+                if self.mode == "leader":
+                    lease = self.store.get("leader")
+                    if lease and lease.get("owner") == self.replica_id:
+                        self.store.delete("leader")
+                else:
+                    self.store.delete(f"member-{self.replica_id}")
+        except Exception as e:
+            print(f"Coordination release failed: {e}")
+
+    def owns(self, zone_name: str) -> bool:
+        if self.mode == "off":
+            return True
+        with self._lock:
+            if time.time() > self._valid_until:
+                return False
+            if self.mode == "leader":
+                return self._leader
+            return ring_owner(self._ring, zone_name) == self.replica_id
+
+    def select(self, targets: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        return [t for t in targets if self.owns(t["zone"])]
+
+    def start(self, stop_event: threading.Event) -> None:
+        """Run heartbeats in a daemon thread until ``stop_event`` is set."""
+        if self.mode == "off":
+            return
+
+        def _run():
+            while not stop_event.is_set():
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    print(f"Coordination heartbeat failed: {e}")
+                stop_event.wait(max(1.0, self.lease_ttl / 3))
+            self.release()
+
+        # First heartbeat inline so the first tick already sees the membership
+        try:
+            self.heartbeat()
+        except Exception as e:
+            print(f"Coordination heartbeat failed: {e}")
+        threading.Thread(target=_run, daemon=True).start()
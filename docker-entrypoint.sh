@@ -11,5 +11,4 @@ case "$(echo "$DEBUG" | tr '[:upper:]' '[:lower:]')" in
 		echo "==============================="
 		;;
 esac
-exec python -u hetzner_ddns.py
-	exec python -u hetzner_ddns.py
+exec python -u hetzner_ddns.py "$@"
@@ -0,0 +1,136 @@
+import os
+import hmac
+import time
+import base64
+import ipaddress
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import hetzner_api
+
+DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def target_hostname(target: Dict[str, str]) -> str:
+    """FQDN for a configured target, e.g. home@example.com -> home.example.com."""
+    name = target["name"]
+    zone = target["zone"].rstrip(".").lower()
+    return zone if name in ("@", "") else f"{name.lower()}.{zone}"
+
+
+class DynDnsUpdater:
+    """Server side of the dyndns2 protocol (``/nic/update``).
+
+    Hostnames are mapped to the configured targets; only those can be
+    updated. Repeated requests with the same address within
+    ``dedup_seconds`` are answered with ``nochg`` without calling the API,
+    so a router that fires several times per change costs one update.
+    """
+
+    def __init__(self, h_type: str, targets: List[Dict[str, str]], user: str, password: str, dedup_seconds: float = 60):
+        self.h_type = h_type
+        self.user = user
+        self.password = password
+        self.dedup_seconds = dedup_seconds
+        self._hosts: Dict[str, List[Dict[str, str]]] = {}
+        for t in targets:
+            self._hosts.setdefault(target_hostname(t), []).append(t)
+        # Guards _recent and _key_locks only; never held across API calls
+        self._lock = threading.Lock()
+        # (hostname, type) -> (ip, monotonic time of last confirmation)
+        self._recent: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        # (hostname, type) -> lock serializing bursts for that record only
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def check_auth(self, header: Optional[str]) -> bool:
+        if not self.password or not header or not header.startswith("Basic "):
+            return False
+        try:
+            user, _, password = base64.b64decode(header[6:]).partition(b":")
+        except Exception:
+            return False
+        # compare_digest only accepts ASCII str; bytes work for any credentials
+        user_ok = hmac.compare_digest(user, self.user.encode("utf-8"))
+        return hmac.compare_digest(password, self.password.encode("utf-8")) and user_ok
+
+    def update(self, hostnames: str, myip: str, client_ip: str) -> List[str]:
+        """Handle one request; returns one dyndns2 response line per hostname."""
+        ips = []
+        for raw in (myip or client_ip or "").split(","):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                ip = ipaddress.ip_address(raw)
+            except ValueError:
+                return ["dnserr"]
+            # Private, loopback or link-local addresses (e.g. the router's LAN
+            # address when myip is omitted) must never end up in public DNS
+            if not ip.is_global:
+                if DEBUG:
+                    print(f"[DEBUG] dyndns: rejecting non-public address {ip}")
+                return ["dnserr"]
+            ips.append(ip)
+        if not ips:
+            return ["dnserr"]
+        out = []
+        for host in (h.strip().rstrip(".").lower() for h in (hostnames or "").split(",")):
+            if not host:
+                out.append("notfqdn")
+            elif host not in self._hosts:
+                out.append("nohost")
+            else:
+                out.append(self._update_host(host, ips))
+        return out or ["notfqdn"]
+
+    def _update_host(self, host: str, ips: List[Any]) -> str:
+        changed = False
+        applied = []
+        for ip in ips:
+            rtype = "AAAA" if ip.version == 6 else "A"
+            value = str(ip)
+            for t in self._hosts[host]:
+                if t["type"] != rtype:
+                    continue
+                key = (host, rtype)
+                with self._lock:
+                    key_lock = self._key_locks.setdefault(key, threading.Lock())
+                # Requests for the same record wait for the one in flight and
+                # then hit the dedup check; other hosts are not blocked
+                with key_lock:
+                    if self._is_recent(key, value):
+                        if DEBUG:
+                            print(f"[DEBUG] dyndns: {host} {rtype} {value} deduplicated")
+                        applied.append(value)
+                        continue
+                    try:
+                        changed = self._apply(t, rtype, value) or changed
+                    except LookupError:
+                        return "nohost"
+                    except Exception as e:
+                        print(f"dyndns update for {host} failed: {e}")
+                        return "911"
+                    with self._lock:
+                        self._recent[key] = (value, time.monotonic())
+                    applied.append(value)
+        if not applied:
+            # Host is configured, but not for the address family that was sent
+            return "nohost"
+        return f"{'good' if changed else 'nochg'} {','.join(dict.fromkeys(applied))}"
+
+    def _is_recent(self, key: Tuple[str, str], value: str) -> bool:
+        with self._lock:
+            recent = self._recent.get(key)
+        return bool(recent and recent[0] == value and time.monotonic() - recent[1] < self.dedup_seconds)
+
+    def _apply(self, target: Dict[str, str], rtype: str, value: str) -> bool:
+        zone_id = hetzner_api.get_zone_id(self.h_type, target["zone"])
+        records = hetzner_api.get_records(self.h_type, zone_id)
+        record = next((r for r in records if r.get("type") == rtype and r.get("name") == target["name"]), None)
+        if not record:
+            raise LookupError(f"Record {rtype} {target['name']} not found in zone {target['zone']}")
+        if record.get("value") == value:
+            return False
+        print(f"dyndns: updating {target['name']}.{target['zone']} ({rtype}) from {record.get('value')} to {value}")
+        hetzner_api.update_record(self.h_type, record["id"], target["zone"], rtype, target["name"], value, record.get("ttl"))
+        return True
@@ -53,20 +53,36 @@ def list_zones(h_type: str) -> List[Dict[str, Any]]:
     if h_type == 'dns':
         url = 'https://dns.hetzner.com/api/v1/zones'
         headers = {"Auth-API-Token": token, "Accept": "application/json"}
-        if DEBUG:
-            print(f"[DEBUG] list_zones: GET {url}")
-        r = requests.get(url, headers=headers, timeout=15)
-        if DEBUG:
-            print(f"[DEBUG] list_zones status={r.status_code}")
-        r.raise_for_status()
-        data = r.json()
-        zones = data.get('zones', [])
-        return [{"name": z.get('name', ''), "id": z.get('id', '')} for z in zones]
+        out: List[Dict[str, Any]] = []
+        page: Optional[int] = 1
+        while page:
+            if DEBUG:
+                print(f"[DEBUG] list_zones: GET {url} page={page}")
+            r = requests.get(url, headers=headers, params={"page": page, "per_page": 100}, timeout=15)
+            if DEBUG:
+                print(f"[DEBUG] list_zones status={r.status_code}")
+            r.raise_for_status()
+            data = r.json()
+            zones = data.get('zones', [])
+            out.extend({"name": z.get('name', ''), "id": z.get('id', '')} for z in zones)
+            page = ((data.get('meta') or {}).get('pagination') or {}).get('next_page')
+        return out
     else:
-        # Optional: Implement cloud zones listing if needed
-        if DEBUG:
-            print(f"[DEBUG] list_zones: unsupported type '{h_type}', fallback")
-        return [{"name": os.environ.get('ZONE_NAME', '')}]
+        url = 'https://api.hetzner.cloud/v1/dns/zones'
+        out = []
+        page = 1
+        while page:
+            if DEBUG:
+                print(f"[DEBUG] list_zones: GET {url} page={page}")
+            r = requests.get(url, headers=_headers('cloud'), params={"page": page, "per_page": 100}, timeout=15)
+            if DEBUG:
+                print(f"[DEBUG] list_zones status={r.status_code}")
+            r.raise_for_status()
+            data = r.json()
+            zones = data.get('zones') or data.get('dns_zones') or []
+            out.extend({"name": z.get('name', ''), "id": z.get('id') or z.get('zone_id') or ''} for z in zones)
+            page = ((data.get('meta') or {}).get('pagination') or {}).get('next_page')
+        return out
 
 
 def get_zone_id(h_type: str, zone_name: str) -> str:
@@ -82,14 +98,9 @@ def get_zone_id(h_type: str, zone_name: str) -> str:
         if not token:
             raise RuntimeError("Kein API Token gesetzt")
         try:
-            url = 'https://api.hetzner.cloud/v1/dns/zones'
-            r = requests.get(url, headers=_headers('cloud'), timeout=15)
-            r.raise_for_status()
-            data = r.json()
-            zones = data.get('zones') or data.get('dns_zones') or []
-            for z in zones:
+            for z in list_zones('cloud'):
                 if z.get('name') == zone_name:
-                    return z.get('id') or z.get('zone_id') or ''
+                    return z.get('id', '')
         except Exception as e:
             if DEBUG:
                 print(f"[DEBUG] get_zone_id cloud failed: {e}")
@@ -115,9 +126,10 @@ def get_records(h_type: str, zone_id: str) -> List[Dict[str, Any]]:
         return data.get('records', [])
 
 
-def create_record(h_type: str, zone_name: str, rtype: str, name: str, value: str, ttl: Optional[int] = None) -> Dict[str, Any]:
+def create_record(h_type: str, zone_name: str, rtype: str, name: str, value: str, ttl: Optional[int] = None, zone_id: Optional[str] = None) -> Dict[str, Any]:
+    # zone_id may be passed by callers that already resolved the zone (batched writes)
     if h_type == 'cloud':
-        zid = get_zone_id('cloud', zone_name)
+        zid = zone_id or get_zone_id('cloud', zone_name)
         url = f"https://api.hetzner.cloud/v1/dns/zones/{zid}/records"
         norm_value = _normalize_value(rtype, value)
         payload_rec: Dict[str, Any] = {"type": rtype, "name": name, "value": norm_value}
@@ -126,7 +138,7 @@ def create_record(h_type: str, zone_name: str, rtype: str, name: str, value: str
         payload = {"dns_record": payload_rec}
         r = requests.post(url, headers=_headers('cloud', json_content=True), json=payload, timeout=15)
     else:
-        zid = get_zone_id('dns', zone_name)
+        zid = zone_id or get_zone_id('dns', zone_name)
         url = "https://dns.hetzner.com/api/v1/records"
         norm_value = _normalize_value(rtype, value)
         payload: Dict[str, Any] = {"zone_id": zid, "type": rtype, "name": name, "value": norm_value}
@@ -139,9 +151,9 @@ def create_record(h_type: str, zone_name: str, rtype: str, name: str, value: str
     return r.json()
 
 
-def update_record(h_type: str, record_id: str, zone_name: str, rtype: str, name: str, value: str, ttl: Optional[int]) -> Dict[str, Any]:
+def update_record(h_type: str, record_id: str, zone_name: str, rtype: str, name: str, value: str, ttl: Optional[int], zone_id: Optional[str] = None) -> Dict[str, Any]:
     if h_type == 'cloud':
-        zid = get_zone_id('cloud', zone_name)
+        zid = zone_id or get_zone_id('cloud', zone_name)
         url = f"https://api.hetzner.cloud/v1/dns/zones/{zid}/records/{record_id}"
         norm_value = _normalize_value(rtype, value)
         payload_rec: Dict[str, Any] = {"type": rtype, "name": name, "value": norm_value}
@@ -152,7 +164,7 @@ def update_record(h_type: str, record_id: str, zone_name: str, rtype: str, name:
     else:
         url = f"https://dns.hetzner.com/api/v1/records/{record_id}"
         # Hetzner DNS Update requires full record fields.
-        zid = get_zone_id('dns', zone_name)
+        zid = zone_id or get_zone_id('dns', zone_name)
         norm_value = _normalize_value(rtype, value)
         payload: Dict[str, Any] = {
             "zone_id": zid,
@@ -173,9 +185,9 @@ def update_record(h_type: str, record_id: str, zone_name: str, rtype: str, name:
     return r.json()
 
 
-def delete_record(h_type: str, record_id: str, zone_name: str) -> Dict[str, Any]:
+def delete_record(h_type: str, record_id: str, zone_name: str, zone_id: Optional[str] = None) -> Dict[str, Any]:
     if h_type == 'cloud':
-        zid = get_zone_id('cloud', zone_name)
+        zid = zone_id or get_zone_id('cloud', zone_name)
         url = f"https://api.hetzner.cloud/v1/dns/zones/{zid}/records/{record_id}"
         r = requests.delete(url, headers=_headers('cloud'), timeout=15)
     else:
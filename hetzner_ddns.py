@@ -1,37 +1,138 @@
-
 import os
 import sys
 import time
-import requests
-
-if os.getenv("SHOW_TABLE", "0").strip().lower() in ("1", "true", "yes", "on"):
-  from table_server import run_table_server
+import random
+import signal
+import socket
+import threading
 
-print("starting up!")
 # API URLs
 HETZNER_DNS_API_URL = "https://dns.hetzner.com/api/v1"
 HETZNER_CLOUD_API_URL = "https://api.hetzner.cloud/v1"
 
+# Problems found while reading the environment; reported by validate_config()
+_CONFIG_ERRORS = []
+
+def _env_flag(name, default):
+  return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+def _env_number(name, default, cast=int):
+  raw = os.getenv(name)
+  if raw is None or not raw.strip():
+    return default
+  try:
+    return cast(raw.strip())
+  except ValueError:
+    _CONFIG_ERRORS.append(f"{name} must be a number, got '{raw}'")
+    return default
+
 # Environment Variables
 ZONE_NAME = os.getenv("ZONE_NAME")
 API_TOKEN = os.getenv("API_TOKEN")
 RECORD_TYPE = os.getenv("RECORD_TYPE", "A")
 RECORD_NAME = os.getenv("RECORD_NAME", "@")
-INTERVAL = int(os.getenv("INTERVAL", "300"))  # Interval in seconds
+INTERVAL = _env_number("INTERVAL", 300)  # Interval in seconds
+# Scheduler tuning: random spread per tick (fraction of the interval), shorter
+# interval for FAST_CYCLES ticks after an IP change, cap for error backoff
+JITTER = _env_number("JITTER", 0.1, float)
+FAST_INTERVAL = _env_number("FAST_INTERVAL", 30)
+FAST_CYCLES = _env_number("FAST_CYCLES", 10)
+BACKOFF_MAX = _env_number("BACKOFF_MAX", 3600)
+# Optional list of several records: "name@zone[:TYPE]", comma separated.
+# Defaults to the single RECORD_NAME@ZONE_NAME:RECORD_TYPE.
+RECORDS = os.getenv("RECORDS", "")
+# Coordination of several replicas: off (default), leader or shard
+COORDINATION = os.getenv("COORDINATION", "off").strip().lower()
+COORDINATION_DIR = os.getenv("COORDINATION_DIR", "/data/coordination")
+REPLICA_ID = os.getenv("REPLICA_ID") or socket.gethostname()
+LEASE_TTL = _env_number("LEASE_TTL", 30)
+# Optional state file: remembers the last confirmed value per record so runs
+# with an unchanged public IP skip the API (rechecked after STATE_MAX_AGE)
+STATE_FILE = os.getenv("STATE_FILE", "")
+STATE_MAX_AGE = _env_number("STATE_MAX_AGE", 3600)
+# dyndns2 push endpoint (/nic/update) on the table server, enabled by a password
+DYNDNS_USER = os.getenv("DYNDNS_USER", "dyndns")
+DYNDNS_PASSWORD = os.getenv("DYNDNS_PASSWORD", "")
+DYNDNS_DEDUP = _env_number("DYNDNS_DEDUP", 60)
+# Parallel zone fetches for --where/--replace and /api/where
+REVERSE_INDEX_WORKERS = _env_number("REVERSE_INDEX_WORKERS", 8)
 # NEW: Choose API type: "dns" (default) or "cloud"
 HETZNER_API_TYPE = os.getenv("HETZNER_API_TYPE", "dns").lower()
 # DEBUG-Variable
-
-DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+DEBUG = _env_flag("DEBUG", "0")
 # SHOW_TABLE Variable
-SHOW_TABLE = os.getenv("SHOW_TABLE", "0").strip().lower() in ("1", "true", "yes", "on")
+SHOW_TABLE = _env_flag("SHOW_TABLE", "0")
 # START_BACKGROUND_UPDATE steuert das Starten des DDNS-Updaters
-START_BACKGROUND_UPDATE = os.getenv("START_BACKGROUND_UPDATE", "1").strip().lower() in ("1", "true", "yes", "on")
+START_BACKGROUND_UPDATE = _env_flag("START_BACKGROUND_UPDATE", "1")
+
+def parse_records(spec):
+  """Parse RECORDS ("home@example.com,vpn@example.org:AAAA") into targets."""
+  targets = []
+  for item in spec.replace(";", ",").split(","):
+    item = item.strip()
+    if not item:
+      continue
+    name, sep, rest = item.partition("@")
+    if not sep or not name or not rest:
+      raise ValueError(f"Invalid RECORDS entry '{item}', expected name@zone[:TYPE]")
+    zone, _, rtype = rest.partition(":")
+    targets.append({"zone": zone.strip(), "name": name.strip(), "type": (rtype.strip() or RECORD_TYPE).upper()})
+  return targets
+
+if RECORDS:
+  try:
+    TARGETS = parse_records(RECORDS)
+  except ValueError as e:
+    _CONFIG_ERRORS.append(str(e))
+    TARGETS = []
+  if not ZONE_NAME and TARGETS:
+    ZONE_NAME = TARGETS[0]["zone"]
+else:
+  TARGETS = [{"zone": ZONE_NAME, "name": RECORD_NAME, "type": RECORD_TYPE}]
+
+# Exit codes of main()
+EXIT_OK = 0        # everything reconciled (changed or unchanged)
+EXIT_CONFIG = 1    # invalid configuration
+EXIT_PARTIAL = 2   # some records failed or were not found
+EXIT_FAILED = 3    # no record could be reconciled
+
+# Set in main() when COORDINATION is enabled
+coordinator = None
+
+def validate_config():
+  """Return a list of configuration problems; empty if the config is usable."""
+  errors = list(_CONFIG_ERRORS)
+  if not (ZONE_NAME and API_TOKEN and RECORD_TYPE and RECORD_NAME and TARGETS):
+    errors.append("Please set ZONE_NAME, API_TOKEN, RECORD_TYPE, and RECORD_NAME (or RECORDS) environment variables.")
+  if HETZNER_API_TYPE not in ("dns", "cloud"):
+    errors.append(f"HETZNER_API_TYPE must be 'dns' or 'cloud', got '{HETZNER_API_TYPE}'.")
+  for t in TARGETS:
+    if t["type"] not in ("A", "AAAA"):
+      errors.append(f"Record type for {t['name']}@{t['zone']} must be A or AAAA, got '{t['type']}'.")
+  if INTERVAL < 1 or FAST_INTERVAL < 1:
+    errors.append("INTERVAL and FAST_INTERVAL must be at least 1 second.")
+  if not 0 <= JITTER < 1:
+    errors.append("JITTER must be between 0 and 1.")
+  if COORDINATION not in ("off", "leader", "shard"):
+    errors.append("COORDINATION must be one of off, leader, shard.")
+  return errors
+
+def validate_lookup_config():
+  """Configuration problems for --where/--replace, which need no record settings."""
+  errors = []
+  if not API_TOKEN:
+    errors.append("Please set the API_TOKEN environment variable.")
+  if HETZNER_API_TYPE not in ("dns", "cloud"):
+    errors.append(f"HETZNER_API_TYPE must be 'dns' or 'cloud', got '{HETZNER_API_TYPE}'.")
+  return errors
 
-# Validate required ENV
-if not (ZONE_NAME and API_TOKEN and RECORD_TYPE and RECORD_NAME):
-  print("Please set ZONE_NAME, API_TOKEN, RECORD_TYPE, and RECORD_NAME environment variables.")
-  sys.exit(1)
+# Per-request timeout; a hung call must not outlive SIGTERM or a --once run
+HTTP_TIMEOUT = 15
+
+def _http():
+  # requests is the bulk of the import time; load it on first API call only
+  import requests
+  return requests
 
 def get_headers():
   if HETZNER_API_TYPE == "cloud":
@@ -44,14 +145,14 @@ def get_public_ip(record_type):
     url = "https://api64.ipify.org"
   else:
     url = "https://api.ipify.org"
-  resp = requests.get(url)
+  resp = _http().get(url, timeout=HTTP_TIMEOUT)
   resp.raise_for_status()
   return resp.text.strip()
 
-def get_zone_id_dns():
+def get_zone_id_dns(zone_target=None):
   # Read target zone from current environment to support dynamic selection
-  zone_target = os.getenv("ZONE_NAME")
-  resp = requests.get(f"{HETZNER_DNS_API_URL}/zones", headers=get_headers())
+  zone_target = zone_target or os.getenv("ZONE_NAME")
+  resp = _http().get(f"{HETZNER_DNS_API_URL}/zones", headers=get_headers(), timeout=HTTP_TIMEOUT)
   if DEBUG:
     print("[DEBUG] Response von /zones:", resp.text)
   resp.raise_for_status()
@@ -61,11 +162,11 @@ def get_zone_id_dns():
       return zone.get("id")
   raise Exception(f"Zone {zone_target} not found (DNS API).")
 
-def get_zone_id_cloud():
+def get_zone_id_cloud(zone_target=None):
   # Read target zone from current environment to support dynamic selection
   # ref: https://docs.hetzner.cloud/reference/cloud#get-api-v1-dns-zones
-  zone_target = os.getenv("ZONE_NAME")
-  resp = requests.get(f"{HETZNER_CLOUD_API_URL}/dns/zones", headers=get_headers())
+  zone_target = zone_target or os.getenv("ZONE_NAME")
+  resp = _http().get(f"{HETZNER_CLOUD_API_URL}/dns/zones", headers=get_headers(), timeout=HTTP_TIMEOUT)
   if DEBUG:
     print("[DEBUG] Response von /dns/zones:", resp.text)
   resp.raise_for_status()
@@ -76,7 +177,7 @@ def get_zone_id_cloud():
   raise Exception(f"Zone {zone_target} not found (Cloud API).")
 
 def get_record_dns(zone_id):
-  resp = requests.get(f"{HETZNER_DNS_API_URL}/records?zone_id={zone_id}", headers=get_headers())
+  resp = _http().get(f"{HETZNER_DNS_API_URL}/records?zone_id={zone_id}", headers=get_headers(), timeout=HTTP_TIMEOUT)
   if DEBUG:
     print(f"[DEBUG] Response von /records?zone_id={zone_id}:", resp.text)
   resp.raise_for_status()
@@ -85,93 +186,343 @@ def get_record_dns(zone_id):
 
 def get_record_cloud(zone_id):
   # ref: https://docs.hetzner.cloud/reference/cloud#get-api-v1-dns-zones-zone_id-records
-  resp = requests.get(f"{HETZNER_CLOUD_API_URL}/dns/zones/{zone_id}/records", headers=get_headers())
+  resp = _http().get(f"{HETZNER_CLOUD_API_URL}/dns/zones/{zone_id}/records", headers=get_headers(), timeout=HTTP_TIMEOUT)
   if DEBUG:
     print(f"[DEBUG] Response von /dns/zones/{zone_id}/records:", resp.text)
   resp.raise_for_status()
   records = resp.json().get("dns_records", [])
   return records
 
-def update_record_dns(record_id, zone_id, value, ttl):
+def update_record_dns(record_id, zone_id, value, ttl, record_type=None, record_name=None):
   data = {
     "zone_id": zone_id,
-    "type": RECORD_TYPE,
-    "name": RECORD_NAME,
+    "type": record_type or RECORD_TYPE,
+    "name": record_name or RECORD_NAME,
     "value": value,
     "ttl": ttl
   }
-  resp = requests.put(f"{HETZNER_DNS_API_URL}/records/{record_id}", headers=get_headers(), json=data)
+  resp = _http().put(f"{HETZNER_DNS_API_URL}/records/{record_id}", headers=get_headers(), json=data, timeout=HTTP_TIMEOUT)
   if DEBUG:
     print(f"[DEBUG] Response von PUT /records/{record_id}:", resp.text)
   resp.raise_for_status()
   return resp.json()["record"]
 
-def update_record_cloud(record_id, zone_id, value, ttl):
+def update_record_cloud(record_id, zone_id, value, ttl, record_type=None, record_name=None):
   data = {
-    "type": RECORD_TYPE,
-    "name": RECORD_NAME,
+    "type": record_type or RECORD_TYPE,
+    "name": record_name or RECORD_NAME,
     "value": value,
     "ttl": ttl
   }
-  resp = requests.put(
+  resp = _http().put(
     f"{HETZNER_CLOUD_API_URL}/dns/zones/{zone_id}/records/{record_id}",
     headers=get_headers(),
-    json={"dns_record": data}
+    json={"dns_record": data},
+    timeout=HTTP_TIMEOUT
   )
   if DEBUG:
     print(f"[DEBUG] Response von PUT /dns/zones/{zone_id}/records/{record_id}:", resp.text)
   resp.raise_for_status()
   return resp.json()["dns_record"]
 
-def main_loop():
-  last_ip = None
-  while True:
+def target_key(target):
+  return f"{target['name']}@{target['zone']}:{target['type']}"
+
+def load_state(path):
+  """Read the persisted state file; a missing or broken file means no state."""
+  import json
+  try:
+    with open(path, "r", encoding="utf-8") as f:
+      state = json.load(f)
+    return state if isinstance(state, dict) else {}
+  except (OSError, ValueError):
+    return {}
+
+def save_state(path, state):
+  import json
+  tmp = f"{path}.{os.getpid()}.tmp"
+  with open(tmp, "w", encoding="utf-8") as f:
+    json.dump(state, f, indent=2, sort_keys=True)
+  os.replace(tmp, path)
+
+def reconcile(targets=None, state=None, force=False):
+  """Reconcile the given targets (default: those owned by this replica).
+
+  With a ``state`` dict, records whose last confirmed value equals the current
+  public IP and that were checked less than STATE_MAX_AGE seconds ago are not
+  read from the API again. ``state`` is updated in place.
+
+  Returns a summary dict with ``changed``, ``unchanged``, ``missing``,
+  ``errors``, ``public_ip`` and ``timings`` (milliseconds).
+  """
+  started = time.monotonic()
+  if targets is None:
+    targets = coordinator.select(TARGETS) if coordinator else TARGETS
+  summary = {"changed": [], "unchanged": [], "missing": [], "errors": [], "public_ip": {}, "timings": {}}
+  if not targets:
+    if DEBUG:
+      print(f"[DEBUG] replica {REPLICA_ID} owns no records this tick ({COORDINATION})")
+    summary["timings"]["total_ms"] = 0.0
+    return summary
+
+  api_label = "Cloud API" if HETZNER_API_TYPE == "cloud" else "DNS API"
+  known = state.setdefault("records", {}) if state is not None else {}
+  public_ips = summary["public_ip"]
+  timings = summary["timings"]
+  zones = {}
+  for target in targets:
+    zone_name, record_name, record_type = target["zone"], target["name"], target["type"]
+    entry = {"zone": zone_name, "name": record_name, "type": record_type}
     try:
-      current_ip = get_public_ip(RECORD_TYPE)
-      print(f"Current public IP: {current_ip}")
-
-      if HETZNER_API_TYPE == "cloud":
-        zone_id = get_zone_id_cloud()
-        records = get_record_cloud(zone_id)
-        # Suche nach passendem Record
-        record = next((r for r in records if r.get("type") == RECORD_TYPE and r.get("name") == RECORD_NAME), None)
-        if record:
-          print(f"(Cloud API) DNS {RECORD_TYPE} record ({RECORD_NAME}) value: {record['value']}")
-          if current_ip != record["value"]:
-            print(f"IP mismatch, updating record {RECORD_NAME}.{ZONE_NAME} from {record['value']} to {current_ip}")
-            updated = update_record_cloud(record["id"], zone_id, current_ip, record["ttl"])
-            print(f"Record updated: {updated}")
-          else:
-            print(f"No DNS update required for {RECORD_NAME}.{ZONE_NAME} with IP {current_ip}")
+      if record_type not in public_ips:
+        t0 = time.monotonic()
+        public_ips[record_type] = get_public_ip(record_type)
+        timings[f"public_ip_{record_type}_ms"] = round((time.monotonic() - t0) * 1000, 1)
+        print(f"Current public IP ({record_type}): {public_ips[record_type]}")
+      current_ip = public_ips[record_type]
+
+      cached = known.get(target_key(target))
+      if (not force and cached and cached.get("value") == current_ip
+          and time.time() - cached.get("checked_at", 0) < STATE_MAX_AGE):
+        print(f"No DNS update required for {record_name}.{zone_name} with IP {current_ip} (state file)")
+        summary["unchanged"].append({**entry, "value": current_ip, "cached": True})
+        continue
+
+      # Resolve zone and fetch its records once per cycle
+      if zone_name not in zones:
+        t0 = time.monotonic()
+        if HETZNER_API_TYPE == "cloud":
+          zone_id = get_zone_id_cloud(zone_name)
+          zones[zone_name] = (zone_id, get_record_cloud(zone_id))
         else:
-          print(f"Record {RECORD_TYPE} {RECORD_NAME} not found in zone {ZONE_NAME} (Cloud API).")
+          zone_id = get_zone_id_dns(zone_name)
+          zones[zone_name] = (zone_id, get_record_dns(zone_id))
+        timings[f"zone_{zone_name}_ms"] = round((time.monotonic() - t0) * 1000, 1)
+      zone_id, records = zones[zone_name]
+
+      # Suche nach passendem Record
+      record = next((r for r in records if r.get("type") == record_type and r.get("name") == record_name), None)
+      if not record:
+        print(f"Record {record_type} {record_name} not found in zone {zone_name} ({api_label}).")
+        summary["missing"].append(entry)
+        continue
+      print(f"({api_label}) DNS {record_type} record ({record_name}) value: {record['value']}")
+      if current_ip == record["value"]:
+        print(f"No DNS update required for {record_name}.{zone_name} with IP {current_ip}")
+        summary["unchanged"].append({**entry, "value": current_ip})
       else:
-        zone_id = get_zone_id_dns()
-        records = get_record_dns(zone_id)
-        record = next((r for r in records if r.get("type") == RECORD_TYPE and r.get("name") == RECORD_NAME), None)
-        if record:
-          print(f"(DNS API) DNS {RECORD_TYPE} record ({RECORD_NAME}) value: {record['value']}")
-          if current_ip != record["value"]:
-            print(f"IP mismatch, updating record {RECORD_NAME}.{ZONE_NAME} from {record['value']} to {current_ip}")
-            updated = update_record_dns(record["id"], zone_id, current_ip, record["ttl"])
-            print(f"Record updated: {updated}")
-          else:
-            print(f"No DNS update required for {RECORD_NAME}.{ZONE_NAME} with IP {current_ip}")
+        print(f"IP mismatch, updating record {record_name}.{zone_name} from {record['value']} to {current_ip}")
+        if HETZNER_API_TYPE == "cloud":
+          updated = update_record_cloud(record["id"], zone_id, current_ip, record["ttl"], record_type, record_name)
         else:
-          print(f"Record {RECORD_TYPE} {RECORD_NAME} not found in zone {ZONE_NAME} (DNS API).")
+          updated = update_record_dns(record["id"], zone_id, current_ip, record["ttl"], record_type, record_name)
+        print(f"Record updated: {updated}")
+        summary["changed"].append({**entry, "old": record["value"], "new": current_ip})
+      known[target_key(target)] = {"value": current_ip, "checked_at": time.time()}
+    except Exception as e:
+      summary["errors"].append({**entry, "error": str(e)})
+  timings["total_ms"] = round((time.monotonic() - started) * 1000, 1)
+  return summary
+
+def run_update():
+  """Run one reconciliation of all configured records owned by this replica.
+
+  Returns True if any record was changed, False otherwise. Errors are raised
+  to the caller so the scheduler can back off.
+  """
+  state = load_state(STATE_FILE) if STATE_FILE else None
+  summary = reconcile(state=state)
+  if state is not None:
+    save_state(STATE_FILE, state)
+  if summary["errors"]:
+    raise Exception("; ".join(f"{e['name']}.{e['zone']} ({e['type']}): {e['error']}" for e in summary["errors"]))
+  return bool(summary["changed"])
+
+def run_once(force=False):
+  """Single reconciliation for cron/systemd timers; prints a JSON summary.
+
+  Log output goes to stderr so stdout stays machine-readable. Returns the
+  process exit code (see EXIT_* constants).
+  """
+  import json
+  from contextlib import redirect_stdout
+  state = load_state(STATE_FILE) if STATE_FILE else None
+  with redirect_stdout(sys.stderr):
+    summary = reconcile(state=state, force=force)
+    if state is not None:
+      try:
+        save_state(STATE_FILE, state)
+      except OSError as e:
+        summary["errors"].append({"zone": "", "name": "", "type": "", "error": f"state file: {e}"})
+  failed = len(summary["errors"]) + len(summary["missing"])
+  if not failed:
+    code = EXIT_OK
+  elif summary["changed"] or summary["unchanged"]:
+    code = EXIT_PARTIAL
+  else:
+    code = EXIT_FAILED
+  summary["exit_code"] = code
+  print(json.dumps(summary, indent=2))
+  return code
+
+# Scheduler state: set by signal handlers, the table server or other threads
+_stop_event = threading.Event()
+_trigger_event = threading.Event()
+
+def request_update():
+  """Wake the scheduler and run an update immediately."""
+  _trigger_event.set()
+
+def request_shutdown():
+  """Stop the scheduler after the current cycle."""
+  _stop_event.set()
+  _trigger_event.set()
+
+def _jittered(seconds):
+  if JITTER <= 0:
+    return seconds
+  return max(0.0, seconds * (1 + random.uniform(-JITTER, JITTER)))
+
+def next_interval(fast_cycles_left, error_count):
+  """Base delay until the next tick, before jitter."""
+  if error_count:
+    # Exponential backoff from the normal interval, capped at BACKOFF_MAX;
+    # errors must never make us poll faster than usual
+    backoff = min(max(INTERVAL, FAST_INTERVAL) * (2 ** (error_count - 1)), BACKOFF_MAX)
+    return max(backoff, INTERVAL)
+  if fast_cycles_left > 0:
+    return min(FAST_INTERVAL, INTERVAL)
+  return INTERVAL
+
+def main_loop():
+  fast_cycles_left = 0
+  error_count = 0
+  # Random start offset so replicas started together don't poll in lockstep
+  next_tick = time.monotonic() + (random.uniform(0, JITTER * INTERVAL) if JITTER > 0 else 0)
+  wake_at = next_tick
+  while not _stop_event.is_set():
+    delay = wake_at - time.monotonic()
+    if delay > 0 and _trigger_event.wait(delay):
+      _trigger_event.clear()
+      if _stop_event.is_set():
+        break
+      print("Immediate update requested.")
+      next_tick = time.monotonic()
+    try:
+      if run_update():
+        fast_cycles_left = FAST_CYCLES
+      elif fast_cycles_left > 0:
+        fast_cycles_left -= 1
+      error_count = 0
     except Exception as e:
+      error_count += 1
       print(f"Error: {e}")
-    time.sleep(INTERVAL)
+    interval = next_interval(fast_cycles_left, error_count)
+    # Fixed-rate ticks: schedule relative to the planned tick, not the cycle end,
+    # and skip ticks that were missed while a slow cycle was running.
+    next_tick += interval
+    if next_tick < time.monotonic():
+      next_tick = time.monotonic() + interval
+    # Jitter only shifts the wake-up time, so it never accumulates into the rate
+    wake_at = next_tick + _jittered(interval) - interval
+    if DEBUG:
+      print(f"[DEBUG] next update in {max(0.0, wake_at - time.monotonic()):.1f}s (errors={error_count}, fast={fast_cycles_left})")
+  print("Updater stopped.")
 
+def _install_signal_handlers():
+  def _on_shutdown(signum, frame):
+    print(f"Received signal {signum}, shutting down.")
+    request_shutdown()
+
+  def _on_trigger(signum, frame):
+    request_update()
+
+  signal.signal(signal.SIGTERM, _on_shutdown)
+  signal.signal(signal.SIGINT, _on_shutdown)
+  # SIGUSR1 triggers an immediate update (not available on Windows)
+  if hasattr(signal, "SIGUSR1"):
+    signal.signal(signal.SIGUSR1, _on_trigger)
+
+
+def run_reverse_lookup(args):
+  """CLI for --where / --replace across all zones of the API token; prints JSON."""
+  import json
+  from record_cache import RecordCache
+  from reverse_index import ReverseIndex
+  index = ReverseIndex(HETZNER_API_TYPE, RecordCache(HETZNER_API_TYPE), workers=REVERSE_INDEX_WORKERS)
+  try:
+    if args.where:
+      matches = index.lookup(args.where, args.record_type)
+      print(json.dumps({"value": args.where, "matches": matches, "zone_errors": index.last_errors}, indent=2))
+      return EXIT_PARTIAL if index.last_errors else EXIT_OK
+    result = index.replace(args.replace[0], args.replace[1], args.record_type, dry_run=args.dry_run)
+  except Exception as e:
+    print(f"Error: {e}", file=sys.stderr)
+    return EXIT_FAILED
+  print(json.dumps(result, indent=2))
+  if not result["errors"]:
+    return EXIT_OK
+  return EXIT_PARTIAL if result["updated"] else EXIT_FAILED
+
+def main(argv=None):
+  import argparse
+  parser = argparse.ArgumentParser(description="Hetzner DNS DynDNS updater")
+  parser.add_argument("--check-config", action="store_true", help="validate the configuration and exit")
+  parser.add_argument("--once", action="store_true", help="reconcile all records once, print a JSON summary and exit")
+  parser.add_argument("--force", action="store_true", help="with --once: ignore the state file and query the API")
+  parser.add_argument("--state-file", help="state file path (overrides STATE_FILE)")
+  parser.add_argument("--where", metavar="VALUE", help="list records in all zones that point at VALUE and exit")
+  parser.add_argument("--replace", nargs=2, metavar=("OLD", "NEW"), help="point all records with value OLD at NEW and exit")
+  parser.add_argument("--type", dest="record_type", help="with --where/--replace: only records of this type")
+  parser.add_argument("--dry-run", action="store_true", help="with --replace: only show what would change")
+  args = parser.parse_args(argv)
+  global STATE_FILE
+  if args.state_file:
+    STATE_FILE = args.state_file
+
+  # Validate before loading any HTTP/UI code so config errors surface instantly
+  lookup = bool(args.where or args.replace) and not (args.check_config or args.once)
+  errors = validate_lookup_config() if lookup else validate_config()
+  if errors:
+    for e in errors:
+      print(e, file=sys.stderr if args.once else sys.stdout)
+    if args.once:
+      # Same document shape as run_once(), so callers always get JSON
+      import json
+      entries = [{"zone": "", "name": "", "type": "", "error": e} for e in errors]
+      print(json.dumps({"changed": [], "unchanged": [], "missing": [], "errors": entries, "exit_code": EXIT_CONFIG}, indent=2))
+    return EXIT_CONFIG
+  if args.check_config:
+    print("Configuration OK.")
+    return EXIT_OK
+  if args.once:
+    return run_once(force=args.force)
+  if args.where or args.replace:
+    return run_reverse_lookup(args)
+
+  print("starting up!")
+  global coordinator
+  if COORDINATION != "off" and START_BACKGROUND_UPDATE:
+    from coordination import Coordinator, FileStore
+    coordinator = Coordinator(COORDINATION, FileStore(COORDINATION_DIR), REPLICA_ID, LEASE_TTL)
 
-if __name__ == "__main__":
-  import threading
   # Fälle:
   # 1) Beide aktiv: Updater im Hintergrund + Table-Server im Vordergrund
   # 2) Nur Updater: main_loop() blockierend
   # 3) Nur Table: nur run_table_server()
   # 4) Nichts: sauber beenden
-  if SHOW_TABLE and START_BACKGROUND_UPDATE:
+  _install_signal_handlers()
+  if coordinator:
+    coordinator.start(_stop_event)
+  # The HTTP server also runs without the Web-UI when only /nic/update is wanted
+  serve_http = SHOW_TABLE or bool(DYNDNS_PASSWORD)
+  if serve_http:
+    from table_server import run_table_server
+    dyndns = None
+    if DYNDNS_PASSWORD:
+      from dyndns import DynDnsUpdater
+      dyndns = DynDnsUpdater(HETZNER_API_TYPE, TARGETS, DYNDNS_USER, DYNDNS_PASSWORD, DYNDNS_DEDUP)
+  if serve_http and START_BACKGROUND_UPDATE:
     t = threading.Thread(target=main_loop, daemon=True)
     t.start()
     run_table_server(
@@ -180,19 +531,33 @@ if __name__ == "__main__":
       get_record_dns=get_record_dns,
       get_record_cloud=get_record_cloud,
       ZONE_NAME=ZONE_NAME,
-      HETZNER_API_TYPE=HETZNER_API_TYPE
+      HETZNER_API_TYPE=HETZNER_API_TYPE,
+      trigger_update=request_update,
+      stop_event=_stop_event,
+      dyndns=dyndns,
+      show_ui=SHOW_TABLE
     )
-  elif START_BACKGROUND_UPDATE and not SHOW_TABLE:
+    t.join(timeout=30)
+  elif START_BACKGROUND_UPDATE and not serve_http:
     main_loop()
-  elif SHOW_TABLE and not START_BACKGROUND_UPDATE:
+  elif serve_http and not START_BACKGROUND_UPDATE:
     run_table_server(
       get_zone_id_dns=get_zone_id_dns,
       get_zone_id_cloud=get_zone_id_cloud,
       get_record_dns=get_record_dns,
       get_record_cloud=get_record_cloud,
       ZONE_NAME=ZONE_NAME,
-      HETZNER_API_TYPE=HETZNER_API_TYPE
+      HETZNER_API_TYPE=HETZNER_API_TYPE,
+      stop_event=_stop_event,
+      dyndns=dyndns,
+      show_ui=SHOW_TABLE
     )
   else:
     print("Weder START_BACKGROUND_UPDATE noch SHOW_TABLE aktiv – nichts zu tun. Beende.")
-    sys.exit(0)
\ No newline at end of file
+  if coordinator:
+    coordinator.release()
+  return EXIT_OK
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import hetzner_api
+from record_index import RecordIndex
+
+DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RecordCache:
+    """In-memory snapshot of the records per zone, shared by the table server.
+
+    Snapshots are fetched on first use and refetched once older than
+    ``max_age`` seconds or after ``refresh()``. Pending writes are applied
+    optimistically with ``apply()`` so the UI sees its edit before the
+    queued API call has run. They are kept as an overlay that every refresh
+    re-applies on top of the fetched records until ``settle()`` is called
+    once the write has reached the API.
+    """
+
+    def __init__(self, h_type: str, max_age: float = 30):
+        self.h_type = h_type
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # zone_name -> (zone_id, records, monotonic fetch time)
+        self._zones: Dict[str, Tuple[str, List[Dict[str, Any]], float]] = {}
+        self._zone_ids: Dict[str, str] = {}
+        # zone_name -> (snapshot list the index was built from, index)
+        self._indexes: Dict[str, Tuple[List[Dict[str, Any]], RecordIndex]] = {}
+        # zone_name -> record id -> (action, record) of writes not yet settled
+        self._overlay: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+        # zone_name -> generation, bumped whenever a fetch that is already
+        # running may have missed a write; _epoch does the same for all zones
+        self._generation: Dict[str, int] = {}
+        self._epoch = 0
+
+    def zone_id(self, zone_name: str) -> str:
+        with self._lock:
+            zid = self._zone_ids.get(zone_name)
+        if zid:
+            return zid
+        zid = hetzner_api.get_zone_id(self.h_type, zone_name)
+        with self._lock:
+            self._zone_ids[zone_name] = zid
+        return zid
+
+    def set_zone_ids(self, zone_ids: Dict[str, str]) -> None:
+        """Seed name -> id from a zone listing so zone_id() needs no lookup."""
+        with self._lock:
+            self._zone_ids.update({name: zid for name, zid in zone_ids.items() if name and zid})
+
+    def records(self, zone_name: str) -> List[Dict[str, Any]]:
+        """Current snapshot for ``zone_name`` (a copy, safe to iterate)."""
+        with self._lock:
+            entry = self._zones.get(zone_name)
+        if entry is None or time.monotonic() - entry[2] > self.max_age:
+            return self.refresh(zone_name)
+        return list(entry[1])
+
+    def snapshot(self, zone_name: str) -> List[Dict[str, Any]]:
+        """Current snapshot list itself (not a copy); treat it as read-only.
+
+        Every refresh or optimistic write replaces the list, so callers can
+        use its identity to tell whether derived data is still current.
+        """
+        snapshot = self.records(zone_name)
+        with self._lock:
+            entry = self._zones.get(zone_name)
+        return entry[1] if entry is not None else snapshot
+
+    def index(self, zone_name: str) -> RecordIndex:
+        """Index over the current snapshot; rebuilt only when the snapshot changed."""
+        recs = self.snapshot(zone_name)
+        with self._lock:
+            cached = self._indexes.get(zone_name)
+            if cached is not None and cached[0] is recs:
+                return cached[1]
+        idx = RecordIndex(recs)
+        with self._lock:
+            self._indexes[zone_name] = (recs, idx)
+        return idx
+
+    def refresh(self, zone_name: str) -> List[Dict[str, Any]]:
+        zid = self.zone_id(zone_name)
+        with self._lock:
+            started = self._gen(zone_name)
+        recs = hetzner_api.get_records(self.h_type, zid)
+        with self._lock:
+            recs = self._overlaid(zone_name, recs)
+            if self._gen(zone_name) != started:
+                # A write settled while we were fetching; this result may
+                # predate it, so keep whatever a later fetch stored instead
+                if DEBUG:
+                    print(f"[DEBUG] record cache: discarding stale fetch of '{zone_name}'")
+                entry = self._zones.get(zone_name)
+                return list(entry[1] if entry is not None else recs)
+            self._bump(zone_name)
+            self._zones[zone_name] = (zid, recs, time.monotonic())
+        if DEBUG:
+            print(f"[DEBUG] record cache: refreshed '{zone_name}' ({len(recs)} records)")
+        return list(recs)
+
+    def invalidate(self, zone_name: Optional[str] = None) -> None:
+        with self._lock:
+            if zone_name is None:
+                self._zones.clear()
+                self._epoch += 1
+            else:
+                self._zones.pop(zone_name, None)
+                self._bump(zone_name)
+
+    def apply(self, zone_name: str, action: str, record: Dict[str, Any]) -> None:
+        """Apply a pending create/update/delete to the cached snapshot."""
+        with self._lock:
+            self._overlay.setdefault(zone_name, {})[record.get("id")] = (action, record)
+            entry = self._zones.get(zone_name)
+            if entry is None:
+                return
+            zid, recs, fetched = entry
+            self._zones[zone_name] = (zid, _apply_op(recs, action, record), fetched)
+
+    def settle(self, zone_name: str, record: Dict[str, Any]) -> None:
+        """Stop re-applying ``record``; the next refresh shows the API's state.
+
+        A no-op if a newer write for the same id has been applied meanwhile.
+        """
+        with self._lock:
+            overlay = self._overlay.get(zone_name, {})
+            rid = record.get("id")
+            if rid in overlay and overlay[rid][1] is record:
+                del overlay[rid]
+                if not overlay:
+                    self._overlay.pop(zone_name, None)
+                self._bump(zone_name)
+
+    def rekey(self, zone_name: str, old_id: str, new_id: str) -> None:
+        """Move the overlay entry of a created record to the id the API assigned."""
+        with self._lock:
+            overlay = self._overlay.get(zone_name, {})
+            if old_id in overlay:
+                action, record = overlay.pop(old_id)
+                record["id"] = new_id
+                overlay[new_id] = (action, record)
+
+    def _gen(self, zone_name: str) -> Tuple[int, int]:
+        # caller holds self._lock
+        return self._epoch, self._generation.get(zone_name, 0)
+
+    def _bump(self, zone_name: str) -> None:
+        # caller holds self._lock
+        self._generation[zone_name] = self._generation.get(zone_name, 0) + 1
+
+    def _overlaid(self, zone_name: str, recs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # caller holds self._lock
+        for action, record in self._overlay.get(zone_name, {}).values():
+            recs = _apply_op(recs, action, record)
+        return recs
+
+
+def _apply_op(recs: List[Dict[str, Any]], action: str, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """New list with one create/update/delete applied; ``recs`` is left alone."""
+    rid = record.get("id")
+    if action == "delete":
+        return [r for r in recs if r.get("id") != rid]
+    if any(r.get("id") == rid for r in recs):
+        return [record if r.get("id") == rid else r for r in recs]
+    return recs + [record]
@@ -0,0 +1,103 @@
+import bisect
+from typing import List, Dict, Any, Optional, Tuple
+
+SORT_KEYS = ("name", "type", "value", "ttl")
+
+
+class RecordIndex:
+    """Lookup structures over one zone snapshot.
+
+    - names: sorted (lowercase name, position) pairs; prefix search by bisect
+    - by_type: record type -> positions
+    - by_value: lowercase value -> positions (reverse lookup)
+
+    Substring filters have no index; they are applied to the candidates the
+    indexed filters left over.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.names: List[Tuple[str, int]] = sorted(
+            (str(r.get("name") or "").lower(), i) for i, r in enumerate(records)
+        )
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_value: Dict[str, List[int]] = {}
+        for i, r in enumerate(records):
+            self.by_type.setdefault(str(r.get("type") or "").upper(), []).append(i)
+            self.by_value.setdefault(normalize_value(r.get("value")), []).append(i)
+
+    def _prefix(self, prefix: str) -> List[int]:
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self.names, (prefix, -1))
+        out = []
+        for name, i in self.names[lo:]:
+            if not name.startswith(prefix):
+                break
+            out.append(i)
+        return out
+
+    def query(
+        self,
+        prefix: Optional[str] = None,
+        name: Optional[str] = None,
+        rtype: Optional[str] = None,
+        value: Optional[str] = None,
+        value_exact: Optional[str] = None,
+        sort: str = "name",
+        desc: bool = False,
+        page: int = 1,
+        page_size: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Filter, sort and paginate; returns (records of the page, total matches).
+
+        ``name`` and ``value`` match substrings; ``value_exact`` uses the
+        value index.
+        """
+        candidates: Optional[set] = None
+
+        def narrow(positions):
+            nonlocal candidates
+            candidates = set(positions) if candidates is None else candidates & set(positions)
+
+        # Most selective index first keeps the intersections small
+        if value_exact:
+            narrow(self.by_value.get(normalize_value(value_exact), ()))
+        if rtype:
+            narrow(self.by_type.get(rtype.upper(), ()))
+        if prefix:
+            narrow(self._prefix(prefix))
+
+        if sort == "name" or sort not in SORT_KEYS:
+            order = [i for _, i in self.names]
+            if candidates is not None:
+                order = [i for i in order if i in candidates]
+        else:
+            order = sorted(
+                range(len(self.records)) if candidates is None else candidates,
+                key=lambda i: _sort_value(self.records[i].get(sort)),
+            )
+        if name:
+            needle = name.lower()
+            order = [i for i in order if needle in str(self.records[i].get("name") or "").lower()]
+        if value:
+            needle = normalize_value(value)
+            order = [i for i in order if needle in normalize_value(self.records[i].get("value"))]
+        if desc:
+            order.reverse()
+
+        total = len(order)
+        if page_size:
+            start = (max(page, 1) - 1) * page_size
+            order = order[start:start + page_size]
+        return [self.records[i] for i in order], total
+
+
+def normalize_value(value: Any) -> str:
+    # TXT values come back quoted from the API; match with or without quotes
+    return str(value or "").strip().strip('"').lower()
+
+
+def _sort_value(v: Any) -> Tuple[int, Any]:
+    if isinstance(v, (int, float)):
+        return (0, v)
+    return (1, str(v or "").lower())
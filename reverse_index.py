@@ -0,0 +1,170 @@
+import os
+import time
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import hetzner_api
+from record_cache import RecordCache
+from record_index import normalize_value
+
+DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ReverseIndex:
+    """Value -> (zone, record) index across all zones of the API token.
+
+    Zone snapshots come from a RecordCache, fetched concurrently by up to
+    ``workers`` threads. A refresh only refetches zones whose snapshot is
+    older than the cache's ``max_age`` (or was invalidated), and only
+    re-indexes zones whose snapshot actually changed.
+    """
+
+    def __init__(self, h_type: str, cache: RecordCache, workers: int = 8):
+        self.h_type = h_type
+        self.cache = cache
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._zones: List[str] = []
+        self._zones_fetched = 0.0
+        # zone -> snapshot list the zone was indexed from
+        self._indexed: Dict[str, List[Dict[str, Any]]] = {}
+        # normalized value -> zone -> records
+        self._by_value: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        # {zone: error} of the last refresh; those zones are missing from lookups
+        self.last_errors: Dict[str, str] = {}
+
+    def zones(self) -> List[str]:
+        with self._lock:
+            if self._zones and time.monotonic() - self._zones_fetched < self.cache.max_age:
+                return list(self._zones)
+        zones = [z for z in hetzner_api.list_zones(self.h_type) if z.get("name")]
+        # The listing already carries the ids; saves one zone lookup per zone
+        self.cache.set_zone_ids({z["name"]: z.get("id", "") for z in zones})
+        names = [z["name"] for z in zones]
+        with self._lock:
+            self._zones = names
+            self._zones_fetched = time.monotonic()
+        return list(names)
+
+    def refresh(self) -> Dict[str, str]:
+        """Bring the index up to date; returns {zone: error} for zones that failed."""
+        zones = self.zones()
+        errors: Dict[str, str] = {}
+
+        def _load(zone: str):
+            try:
+                return zone, self.cache.snapshot(zone), None
+            except Exception as e:
+                return zone, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            results = list(pool.map(_load, zones))
+
+        with self._lock:
+            for zone in set(self._indexed) - set(zones):
+                self._drop(zone)
+            reindexed = 0
+            for zone, recs, err in results:
+                if err is not None:
+                    errors[zone] = err
+                    continue
+                if self._indexed.get(zone) is recs:
+                    continue
+                self._drop(zone)
+                for r in recs:
+                    self._by_value.setdefault(normalize_value(r.get("value")), {}).setdefault(zone, []).append(r)
+                self._indexed[zone] = recs
+                reindexed += 1
+        self.last_errors = errors
+        if DEBUG:
+            print(f"[DEBUG] reverse index: {len(zones)} zones, {reindexed} re-indexed, {len(errors)} failed")
+        return errors
+
+    def _drop(self, zone: str) -> None:
+        # caller holds self._lock
+        for r in self._indexed.pop(zone, []):
+            per_zone = self._by_value.get(normalize_value(r.get("value")))
+            if per_zone is None:
+                continue
+            per_zone.pop(zone, None)
+            if not per_zone:
+                self._by_value.pop(normalize_value(r.get("value")), None)
+
+    def lookup(self, value: str, rtype: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Records pointing at ``value`` in any zone: [{"zone": ..., "record": ...}]."""
+        self.refresh()
+        with self._lock:
+            per_zone = self._by_value.get(normalize_value(value), {})
+            matches = [
+                {"zone": zone, "record": r}
+                for zone in sorted(per_zone)
+                for r in per_zone[zone]
+                if not rtype or str(r.get("type", "")).upper() == rtype.upper()
+            ]
+        return matches
+
+    def replace(self, old: str, new: str, rtype: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Point every record with value ``old`` at ``new``, zone by zone.
+
+        Without ``rtype`` an address ``old`` only matches records of its own
+        family (A or AAAA); records ``new`` is not valid for are reported as
+        errors and left alone.
+        """
+        matches = self.lookup(old, replace_type(old, rtype))
+        result: Dict[str, Any] = {"old": old, "new": new, "updated": [], "errors": [], "dry_run": dry_run}
+        for zone, err in self.last_errors.items():
+            result["errors"].append({"zone": zone, "record": None, "error": err})
+        by_zone: Dict[str, List[Dict[str, Any]]] = {}
+        for m in matches:
+            err = check_value(m["record"].get("type"), new)
+            if err:
+                result["errors"].append({**m, "error": err})
+                continue
+            by_zone.setdefault(m["zone"], []).append(m["record"])
+
+        def _update_zone(zone: str, recs: List[Dict[str, Any]]) -> None:
+            try:
+                zid = self.cache.zone_id(zone)
+            except Exception as e:
+                result["errors"].extend({"zone": zone, "record": r, "error": str(e)} for r in recs)
+                return
+            for r in recs:
+                try:
+                    if not dry_run:
+                        hetzner_api.update_record(self.h_type, r["id"], zone, r.get("type"), r.get("name"), new, r.get("ttl"), zone_id=zid)
+                    result["updated"].append({"zone": zone, "record": {**r, "value": new}})
+                except Exception as e:
+                    result["errors"].append({"zone": zone, "record": r, "error": str(e)})
+            if not dry_run:
+                self.cache.invalidate(zone)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            for zone, recs in by_zone.items():
+                pool.submit(_update_zone, zone, recs)
+        return result
+
+
+def replace_type(old: str, rtype: Optional[str] = None) -> Optional[str]:
+    """Record type a replace of ``old`` is limited to: ``rtype``, else A/AAAA for an address."""
+    if rtype:
+        return rtype
+    try:
+        return "AAAA" if ipaddress.ip_address(old.strip()).version == 6 else "A"
+    except ValueError:
+        return None
+
+
+def check_value(rtype: Optional[str], value: str) -> Optional[str]:
+    """Why ``value`` can't be stored in a record of ``rtype``; None if it can."""
+    rtype = str(rtype or "").upper()
+    if rtype not in ("A", "AAAA"):
+        return None
+    try:
+        version = ipaddress.ip_address(value.strip()).version
+    except ValueError:
+        return f"'{value}' is not an IP address, required for {rtype} records"
+    if version != (6 if rtype == "AAAA" else 4):
+        return f"'{value}' is an IPv{version} address, not valid for {rtype} records"
+    return None
@@ -1,10 +1,14 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from string import Template
 import os
 import json
+import threading
 from urllib.parse import urlparse, parse_qs
 import requests
 import hetzner_api
+from record_cache import RecordCache
+from write_queue import WriteQueue, WriteConflict
+from reverse_index import ReverseIndex, replace_type, check_value
 
 def _labels() -> dict:
   """Load labels from i18n.json based on LANG, flatten to dot-keys.
@@ -110,6 +114,26 @@ def _labels() -> dict:
 DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
 
 
+# Any of these on /api/records switches to the indexed, paginated view
+RECORD_QUERY_PARAMS = ('prefix', 'name', 'type', 'value', 'value_exact', 'sort', 'order', 'page', 'page_size')
+# Rows per page in the Web-UI
+RECORDS_PAGE_SIZE = 50
+
+
+def _int_param(q: dict, name: str, default: int) -> int:
+  try:
+    return max(int(q.get(name, [default])[0]), 0)
+  except ValueError:
+    return default
+
+
+def _env_float(name: str, default: float) -> float:
+  try:
+    return float(os.environ.get(name, default))
+  except ValueError:
+    return default
+
+
 def generate_table_html(records):
   labels = _labels()
   def row_html(r):
@@ -157,12 +181,25 @@ def generate_table_html(records):
   )
 
 
-def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_record_cloud, ZONE_NAME, HETZNER_API_TYPE):
+def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_record_cloud, ZONE_NAME, HETZNER_API_TYPE, trigger_update=None, stop_event=None, dyndns=None, show_ui=True):
+
+    # Record snapshots served to the UI and the queue that batches UI edits
+    record_cache = RecordCache(HETZNER_API_TYPE, max_age=_env_float('RECORD_CACHE_TTL', 30))
+    write_queue = WriteQueue(HETZNER_API_TYPE, record_cache, debounce=_env_float('WRITE_DEBOUNCE_MS', 500) / 1000)
+    # Cross-zone "where is this value used" lookups over the same snapshots
+    reverse_index = ReverseIndex(HETZNER_API_TYPE, record_cache, workers=int(_env_float('REVERSE_INDEX_WORKERS', 8)))
 
     class TableHandler(BaseHTTPRequestHandler):
         def do_GET(self):
             if DEBUG:
                 print(f"[DEBUG] HTTP GET {self.path}")
+            # dyndns2 update endpoint for routers
+            if self.path.startswith('/nic/update'):
+                self.handle_dyndns()
+                return
+            if not show_ui:
+                self.send_not_found()
+                return
             # Static CSS delivery
             if self.path == "/style.css":
                 try:
@@ -203,6 +240,33 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
                 self.wfile.write(json.dumps({"error": f"i18n not found: {e}"}).encode("utf-8"))
               return
 
+            # Write queue status (pending writes, recent failures)
+            if self.path.startswith('/api/writes'):
+                self.send_response(200)
+                self.send_header("Content-type", "application/json; charset=utf-8")
+                self.send_header("Cache-Control", "no-store, no-cache, must-revalidate")
+                self.end_headers()
+                self.wfile.write(json.dumps(write_queue.status()).encode("utf-8"))
+                return
+
+            # Reverse lookup across all zones
+            if self.path.startswith('/api/where'):
+                try:
+                    q = parse_qs(urlparse(self.path).query)
+                    value = q.get('value', [''])[0]
+                    matches = reverse_index.lookup(value, q.get('type', [''])[0]) if value else []
+                    self.send_response(200)
+                    self.send_header("Content-type", "application/json; charset=utf-8")
+                    self.send_header("Cache-Control", "no-store, no-cache, must-revalidate")
+                    self.end_headers()
+                    self.wfile.write(json.dumps({"value": value, "matches": matches, "zone_errors": reverse_index.last_errors}).encode("utf-8"))
+                except Exception as e:
+                    self.send_response(500)
+                    self.send_header("Content-type", "application/json; charset=utf-8")
+                    self.end_headers()
+                    self.wfile.write(json.dumps({"error": str(e)}).encode("utf-8"))
+                return
+
             # Zones API
             if self.path.startswith('/api/zones'):
                 try:
@@ -232,10 +296,28 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
             if self.path.startswith('/api/records'):
                 try:
                     q = parse_qs(urlparse(self.path).query)
-                    zone_name = q.get('zone_name', [os.environ.get('ZONE_NAME', '')])[0]
+                    zone_name = q.get('zone_name', [ZONE_NAME])[0]
                     if DEBUG:
                       print(f"[DEBUG] /api/records for zone '{zone_name}'")
-                    records = self.fetch_records_for_zone(zone_name)
+                    page, page_size = 1, 0
+                    if any(k in q for k in RECORD_QUERY_PARAMS):
+                      # Filtered/paged view served from the snapshot index
+                      page = _int_param(q, 'page', 1)
+                      page_size = min(_int_param(q, 'page_size', 0), 1000)
+                      records, total = record_cache.index(zone_name).query(
+                        prefix=q.get('prefix', [''])[0],
+                        name=q.get('name', [''])[0],
+                        rtype=q.get('type', [''])[0],
+                        value=q.get('value', [''])[0],
+                        value_exact=q.get('value_exact', [''])[0],
+                        sort=q.get('sort', ['name'])[0],
+                        desc=q.get('order', ['asc'])[0] == 'desc',
+                        page=page,
+                        page_size=page_size,
+                      )
+                    else:
+                      records = self.fetch_records_for_zone(zone_name)
+                      total = len(records)
                     if DEBUG:
                       print(f"[DEBUG] /api/records list ({len(records)}):")
                       for r in records:
@@ -246,6 +328,9 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
                     html = generate_table_html(records)
                     self.send_response(200)
                     self.send_header("Content-type", "text/html; charset=utf-8")
+                    self.send_header("X-Total-Count", str(total))
+                    self.send_header("X-Page", str(page))
+                    self.send_header("X-Page-Size", str(page_size or total))
                     self.send_header("Cache-Control", "no-store, no-cache, must-revalidate")
                     self.send_header("Pragma", "no-cache")
                     self.send_header("Expires", "0")
@@ -267,13 +352,10 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
 
             # Dynamic HTML delivery (page)
             try:
-              initial_zone_name = os.environ.get('ZONE_NAME', '')
-              if HETZNER_API_TYPE == "cloud":
-                zone_id = hetzner_api.get_zone_id('cloud', initial_zone_name)
-                records = hetzner_api.get_records('cloud', zone_id)
-              else:
-                zone_id = hetzner_api.get_zone_id('dns', initial_zone_name)
-                records = hetzner_api.get_records('dns', zone_id)
+              initial_zone_name = ZONE_NAME
+              zone_id = record_cache.zone_id(initial_zone_name)
+              # First page only; the UI requests further pages via /api/records
+              records, _ = record_cache.index(initial_zone_name).query(page_size=RECORDS_PAGE_SIZE)
               if DEBUG:
                 print(f"[DEBUG] Page init: type={HETZNER_API_TYPE}, zone='{initial_zone_name}', zone_id={zone_id}, records={len(records)}")
             except Exception as e:
@@ -311,6 +393,7 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
             html = tmpl.substitute(
                 json_zone_name=json.dumps(ZONE_NAME),
                 refresh_ms=_refresh_ms,
+                page_size=RECORDS_PAGE_SIZE,
                 debug_js=('true' if DEBUG else 'false'),
                 table_html=table_html,
               lang_override_json=json.dumps(_lang_override),
@@ -351,22 +434,25 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
               data = {}
             if DEBUG:
               print(f"[DEBUG] HTTP POST {self.path} body={data}")
+            if not show_ui and not self.path.startswith('/api/trigger'):
+              self.send_not_found()
+              return
 
             # API headers are handled in hetzner_api
 
             # Create record
             if self.path.startswith('/api/record/create'):
               try:
-                zone_name = data.get('zone_name') or os.environ.get('ZONE_NAME', '')
+                zone_name = data.get('zone_name') or ZONE_NAME
                 rtype = data.get('type')
                 name = data.get('name')
                 value = data.get('value')
                 ttl = data.get('ttl') or 300
-                resp = hetzner_api.create_record(HETZNER_API_TYPE, zone_name, rtype, name, value, ttl)
-                self.send_response(200)
+                rec = write_queue.submit('create', zone_name, {"type": rtype, "name": name, "value": value, "ttl": ttl})
+                self.send_response(202)
                 self.send_header("Content-type", "application/json; charset=utf-8")
                 self.end_headers()
-                self.wfile.write(json.dumps(resp).encode('utf-8'))
+                self.wfile.write(json.dumps({"queued": True, "record": rec}).encode('utf-8'))
               except Exception as e:
                 self.send_response(500)
                 self.send_header("Content-type", "application/json; charset=utf-8")
@@ -378,16 +464,21 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
             if self.path.startswith('/api/record/update'):
               try:
                 rid = data.get('id')
-                zone_name = data.get('zone_name') or os.environ.get('ZONE_NAME', '')
+                zone_name = data.get('zone_name') or ZONE_NAME
                 rtype = data.get('type')
                 name = data.get('name')
                 value = data.get('value')
                 ttl = data.get('ttl')
-                resp = hetzner_api.update_record(HETZNER_API_TYPE, rid, zone_name, rtype, name, value, ttl)
-                self.send_response(200)
+                rec = write_queue.submit('update', zone_name, {"id": rid, "type": rtype, "name": name, "value": value, "ttl": ttl})
+                self.send_response(202)
                 self.send_header("Content-type", "application/json; charset=utf-8")
                 self.end_headers()
-                self.wfile.write(json.dumps(resp).encode('utf-8'))
+                self.wfile.write(json.dumps({"queued": True, "record": rec}).encode('utf-8'))
+              except WriteConflict as e:
+                self.send_response(409)
+                self.send_header("Content-type", "application/json; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
               except Exception as e:
                 self.send_response(500)
                 self.send_header("Content-type", "application/json; charset=utf-8")
@@ -399,12 +490,12 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
             if self.path.startswith('/api/record/delete'):
               try:
                 rid = data.get('id')
-                zone_name = data.get('zone_name') or os.environ.get('ZONE_NAME', '')
-                resp = hetzner_api.delete_record(HETZNER_API_TYPE, rid, zone_name)
-                self.send_response(200)
+                zone_name = data.get('zone_name') or ZONE_NAME
+                rec = write_queue.submit('delete', zone_name, {"id": rid})
+                self.send_response(202)
                 self.send_header("Content-type", "application/json; charset=utf-8")
                 self.end_headers()
-                self.wfile.write(json.dumps(resp).encode('utf-8'))
+                self.wfile.write(json.dumps({"queued": True, "record": rec}).encode('utf-8'))
               except Exception as e:
                 self.send_response(500)
                 self.send_header("Content-type", "application/json; charset=utf-8")
@@ -412,32 +503,115 @@ def run_table_server(get_zone_id_dns, get_zone_id_cloud, get_record_dns, get_rec
                 self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
               return
 
+            # Bulk update: every record pointing at "old" gets "new", through the write queue
+            if self.path.startswith('/api/where/replace'):
+              try:
+                old = data.get('old') or ''
+                new = data.get('new') or ''
+                if not old or not new:
+                  raise ValueError("'old' and 'new' are required")
+                # Same rules as ReverseIndex.replace: stay within old's address family
+                matches = reverse_index.lookup(old, replace_type(old, data.get('type')))
+                queued, errors = [], []
+                for m in matches:
+                  err = check_value(m['record'].get('type'), new)
+                  if err:
+                    errors.append({**m, "error": err})
+                    continue
+                  if data.get('dry_run'):
+                    continue
+                  try:
+                    queued.append(write_queue.submit('update', m['zone'], {**m['record'], 'value': new}))
+                  except WriteConflict as e:
+                    errors.append({**m, "error": str(e)})
+                self.send_response(202)
+                self.send_header("Content-type", "application/json; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(json.dumps({"matches": matches, "queued": len(queued), "errors": errors}).encode('utf-8'))
+              except Exception as e:
+                self.send_response(500)
+                self.send_header("Content-type", "application/json; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
+              return
+
+            # Trigger an immediate background update
+            if self.path.startswith('/api/trigger'):
+              # Without the Web-UI the port faces routers; require the dyndns credentials
+              if not show_ui and (dyndns is None or not dyndns.check_auth(self.headers.get('Authorization'))):
+                self.send_unauthorized()
+                return
+              if trigger_update is None:
+                self.send_response(503)
+                self.send_header("Content-type", "application/json; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(json.dumps({"error": "Background update not running"}).encode('utf-8'))
+                return
+              trigger_update()
+              self.send_response(202)
+              self.send_header("Content-type", "application/json; charset=utf-8")
+              self.end_headers()
+              self.wfile.write(json.dumps({"triggered": True}).encode('utf-8'))
+              return
+
             # Unknown
+            self.send_not_found()
+
+        def send_not_found(self):
             self.send_response(404)
             self.send_header("Content-type", "application/json; charset=utf-8")
             self.end_headers()
             self.wfile.write(json.dumps({"error": "Not Found"}).encode('utf-8'))
 
+        def send_unauthorized(self):
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", 'Basic realm="hetzner-ddns"')
+            self.send_header("Content-type", "text/plain; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(b"badauth")
+
+        def handle_dyndns(self):
+            if dyndns is None:
+              self.send_not_found()
+              return
+            if not dyndns.check_auth(self.headers.get('Authorization')):
+              self.send_unauthorized()
+              return
+            q = parse_qs(urlparse(self.path).query)
+            lines = dyndns.update(q.get('hostname', [''])[0], q.get('myip', [''])[0], self.client_address[0])
+            if DEBUG:
+              print(f"[DEBUG] /nic/update -> {lines}")
+            self.send_response(200)
+            self.send_header("Content-type", "text/plain; charset=utf-8")
+            self.send_header("Cache-Control", "no-store, no-cache, must-revalidate")
+            self.end_headers()
+            self.wfile.write("\n".join(lines).encode('utf-8'))
+
         def list_zones(self):
           return hetzner_api.list_zones(HETZNER_API_TYPE)
 
         def fetch_records_for_zone(self, zone_name: str):
           if DEBUG:
             print(f"[DEBUG] fetch_records_for_zone: zone_name='{zone_name}' type={HETZNER_API_TYPE}")
-          if HETZNER_API_TYPE == 'cloud':
-            zid = hetzner_api.get_zone_id('cloud', zone_name)
-            recs = hetzner_api.get_records('cloud', zid)
-            if DEBUG:
-              print(f"[DEBUG] fetch_records_for_zone: zone_id={zid}, records={len(recs)}")
-            return recs
-          else:
-            zid = hetzner_api.get_zone_id('dns', zone_name)
-            recs = hetzner_api.get_records('dns', zid)
-            if DEBUG:
-              print(f"[DEBUG] fetch_records_for_zone: zone_id={zid}, records={len(recs)}")
-            return recs
+          recs = record_cache.records(zone_name)
+          if DEBUG:
+            print(f"[DEBUG] fetch_records_for_zone: records={len(recs)}")
+          return recs
 
     server_address = ("", 8080)
-    httpd = HTTPServer(server_address, TableHandler)
+    # One thread per request: a slow Hetzner call behind /nic/update or a
+    # write must not stall other routers or the Web-UI. Shared state (record
+    # cache, write queue, indexes, dyndns) is lock-protected.
+    httpd = ThreadingHTTPServer(server_address, TableHandler)
+    if stop_event is not None:
+        # shutdown() blocks until serve_forever() returns, so call it from a helper thread
+        def _wait_for_stop():
+            stop_event.wait()
+            httpd.shutdown()
+        threading.Thread(target=_wait_for_stop, daemon=True).start()
     print(f"Table-Server läuft auf http://localhost:{server_address[1]}")
     httpd.serve_forever()
+    httpd.server_close()
+    # Don't lose edits that are still waiting in the debounce window
+    write_queue.stop()
+    print("Table-Server gestoppt.")
@@ -0,0 +1,211 @@
+import os
+import time
+import itertools
+import threading
+from typing import List, Dict, Any, Optional
+
+import hetzner_api
+from record_cache import RecordCache
+
+DEBUG = os.getenv("DEBUG", "0").strip().lower() in ("1", "true", "yes", "on")
+
+# Records created through the queue carry this id until the API assigned one
+PENDING_PREFIX = "pending-"
+# How many pending -> real id mappings are remembered for late edits
+ID_MAP_SIZE = 1000
+
+
+class WriteConflict(Exception):
+    """The write contradicts one already queued for the same record."""
+
+
+class WriteQueue:
+    """Debounced, coalescing queue for record writes from the Web-UI.
+
+    ``submit()`` returns immediately with the optimistic record. A worker
+    thread waits until no new write arrived for ``debounce`` seconds (at most
+    ``max_delay``), then runs the pending writes grouped by zone: the zone id
+    is resolved once per batch and the zone snapshot is refreshed once after
+    it. Writes to the same record are coalesced before they reach the API:
+
+      - update after create/update: merged into the earlier operation
+      - delete after create: both dropped
+      - delete after update: only the delete is sent
+      - update after delete: rejected with WriteConflict
+
+    Once a create has run, later writes that still use its ``pending-N`` id
+    are translated to the id the API assigned.
+    """
+
+    def __init__(self, h_type: str, cache: RecordCache, debounce: float = 0.5, max_delay: float = 5.0):
+        self.h_type = h_type
+        self.cache = cache
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        # (zone_name, record id) -> operation; dicts keep insertion order
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+        self._last_submit = 0.0
+        self._first_submit = 0.0
+        self._ids = itertools.count(1)
+        # (zone_name, pending id) -> id assigned by the API
+        self._real_ids: Dict[tuple, str] = {}
+        self._errors: List[Dict[str, Any]] = []
+        self._busy = False
+        self._flush_now = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, action: str, zone_name: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a create/update/delete; returns the optimistic record."""
+        if action not in ("create", "update", "delete"):
+            raise ValueError(f"Unknown action '{action}'")
+        rec = dict(record)
+        if action == "create":
+            rec["id"] = f"{PENDING_PREFIX}{next(self._ids)}"
+        elif not rec.get("id"):
+            raise ValueError("Record id is required")
+        dropped = False
+        with self._cond:
+            rec["id"] = self._real_ids.get((zone_name, rec["id"]), rec["id"])
+            key = (zone_name, rec["id"])
+            prev = self._pending.get(key)
+            if prev is None:
+                self._pending[key] = {"action": action, "zone_name": zone_name, "record": rec}
+            elif action == "delete":
+                if prev["action"] == "create":
+                    del self._pending[key]
+                    dropped = True
+                else:
+                    self._pending[key] = {"action": "delete", "zone_name": zone_name, "record": rec}
+            elif prev["action"] == "delete":
+                raise WriteConflict(f"Record {rec['id']} is already queued for deletion")
+            else:
+                # Merge into the queued create/update; latest field values win
+                prev["record"] = {**prev["record"], **rec}
+                rec = prev["record"]
+            now = time.monotonic()
+            if not self._first_submit:
+                self._first_submit = now
+            self._last_submit = now
+            self._cond.notify()
+        self.cache.apply(zone_name, action, rec)
+        if dropped:
+            # Never reaches the API, so there is nothing to wait for
+            self.cache.settle(zone_name, rec)
+        if DEBUG:
+            print(f"[DEBUG] write queue: {action} {zone_name}/{rec.get('id')} queued ({len(self._pending)} pending)")
+        return rec
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"pending": len(self._pending), "in_flight": self._busy, "errors": list(self._errors)}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Run pending writes now and wait until the queue is empty."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self) -> None:
+        self.flush(timeout=30)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._flush_now = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                if self._stopped and not self._pending:
+                    return
+                # Debounce: wait for a quiet period, bounded by max_delay
+                while True:
+                    now = time.monotonic()
+                    wait = min(self._last_submit + self.debounce, self._first_submit + self.max_delay) - now
+                    if wait <= 0 or self._flush_now or self._stopped:
+                        break
+                    self._cond.wait(wait)
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._first_submit = 0.0
+                self._flush_now = False
+                self._busy = True
+            try:
+                self._execute(batch)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _execute(self, batch: List[Dict[str, Any]]) -> None:
+        by_zone: Dict[str, List[Dict[str, Any]]] = {}
+        for op in batch:
+            by_zone.setdefault(op["zone_name"], []).append(op)
+        errors = []
+        for zone_name, ops in by_zone.items():
+            try:
+                zid = self.cache.zone_id(zone_name)
+            except Exception as e:
+                errors.extend(self._error(op, e) for op in ops)
+                for op in ops:
+                    self.cache.settle(zone_name, op["record"])
+                continue
+            for op in ops:
+                rec = op["record"]
+                try:
+                    if op["action"] == "create":
+                        resp = hetzner_api.create_record(self.h_type, zone_name, rec.get("type"), rec.get("name"), rec.get("value"), rec.get("ttl") or 300, zone_id=zid)
+                        real_id = ((resp or {}).get("record") or (resp or {}).get("dns_record") or {}).get("id")
+                        if real_id:
+                            self._map_id(zone_name, rec["id"], str(real_id))
+                    elif str(rec["id"]).startswith(PENDING_PREFIX):
+                        # Its create failed or was never queued
+                        raise LookupError(f"Record {rec['id']} was not created")
+                    elif op["action"] == "update":
+                        hetzner_api.update_record(self.h_type, rec["id"], zone_name, rec.get("type"), rec.get("name"), rec.get("value"), rec.get("ttl"), zone_id=zid)
+                    else:
+                        hetzner_api.delete_record(self.h_type, rec["id"], zone_name, zone_id=zid)
+                except Exception as e:
+                    errors.append(self._error(op, e))
+                self.cache.settle(zone_name, rec)
+            # One snapshot refresh per zone and batch; drops failed optimistic edits
+            try:
+                self.cache.refresh(zone_name)
+            except Exception as e:
+                self.cache.invalidate(zone_name)
+                if DEBUG:
+                    print(f"[DEBUG] write queue: refresh of '{zone_name}' failed: {e}")
+        with self._cond:
+            # Keep only the most recent failures for the status endpoint
+            self._errors = (self._errors + errors)[-20:]
+        if DEBUG:
+            print(f"[DEBUG] write queue: batch of {len(batch)} writes in {len(by_zone)} zone(s), {len(errors)} error(s)")
+
+    def _map_id(self, zone_name: str, pending_id: str, real_id: str) -> None:
+        """Point a created record and every write queued under its pending id at ``real_id``."""
+        with self._cond:
+            self._real_ids[(zone_name, pending_id)] = real_id
+            while len(self._real_ids) > ID_MAP_SIZE:
+                del self._real_ids[next(iter(self._real_ids))]
+            op = self._pending.pop((zone_name, pending_id), None)
+            if op is not None:
+                op["record"]["id"] = real_id
+                self._pending[(zone_name, real_id)] = op
+        # Also rekeys the create's own record, which settle() then finds by id
+        self.cache.rekey(zone_name, pending_id, real_id)
+
+    def _error(self, op: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+        print(f"Write {op['action']} {op['zone_name']}/{op['record'].get('id')} failed: {exc}")
+        return {"action": op["action"], "zone_name": op["zone_name"], "record": op["record"], "error": str(exc), "time": time.time()}